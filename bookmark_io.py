@@ -0,0 +1,333 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import quoteattr
+
+# ---------------- BULK BOOKMARK IMPORT / EXPORT ----------------
+# Everything here streams: files are read entry by entry and written back
+# in chunks, so memory stays flat apart from the set of seen URLs.
+BOOKMARK_FILE = "bookmarks.json"
+
+FORMATS = ("json", "ndjson", "opml")
+IMPORT_CHUNK = 1000
+READ_CHUNK = 64 * 1024
+# A single bookmark bigger than this is treated as malformed input
+MAX_ENTRY_CHARS = 1024 * 1024
+
+TRACKING_PARAMS = ("fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid")
+
+# bookmarks.json is shared by every session; serialize rewrites of it
+_write_lock = threading.Lock()
+
+
+# ---------------- URL NORMALIZATION ----------------
+def normalize_url(url):
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+
+    # http/https variants of the same story count as one bookmark
+    if scheme in ("http", "https"):
+        scheme = "https"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def _dedupe_key(url):
+    # None for URLs we can't make sense of (bad port, not a string, ...)
+    try:
+        return normalize_url(url)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# ---------------- READERS ----------------
+def _iter_json_array(fp):
+    # Strict: exactly one comma between items, no trailing comma and
+    # nothing but whitespace after the closing bracket
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    # start -> first -> (value -> sep)* -> done
+    state = "start"
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos == len(buf):
+                break
+            ch = buf[pos]
+
+            if state == "done":
+                raise ValueError("Unexpected data after the bookmarks array")
+            if state == "start":
+                if ch != "[":
+                    raise ValueError("Expected a JSON array of bookmarks")
+                state = "first"
+                pos += 1
+                continue
+            if state == "sep":
+                if ch not in ",]":
+                    raise ValueError("Expected ',' or ']' between bookmarks")
+                state = "value" if ch == "," else "done"
+                pos += 1
+                continue
+            if ch == "]" and state == "first":
+                state = "done"
+                pos += 1
+                continue
+            if ch in ",]":
+                raise ValueError("Expected a bookmark")
+
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or len(buf) - pos > MAX_ENTRY_CHARS:
+                    raise
+                break
+            # A value touching the end of the buffer may still be cut off
+            if end == len(buf) and not eof:
+                break
+            pos = end
+            state = "sep"
+            yield obj
+
+        if eof:
+            if state not in ("start", "done"):
+                raise ValueError("Unterminated JSON array")
+            return
+
+        buf = buf[pos:]
+        pos = 0
+        chunk = fp.read(READ_CHUNK)
+        if not chunk:
+            eof = True
+        buf += chunk
+
+def _iter_ndjson(fp):
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def _iter_opml(fp):
+    for _, elem in iterparse(fp, events=("end",)):
+        if elem.tag != "outline":
+            continue
+        url = elem.get("htmlUrl") or elem.get("url") or elem.get("xmlUrl")
+        if url:
+            yield {
+                "source": {"id": None, "name": elem.get("source")},
+                "title": elem.get("title") or elem.get("text"),
+                "description": elem.get("description", ""),
+                "url": url,
+                "urlToImage": elem.get("image"),
+                "publishedAt": elem.get("created"),
+            }
+        elem.clear()
+
+def detect_format(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext in (".opml", ".xml"):
+        return "opml"
+    return "json"
+
+def iter_bookmarks(fp, fmt):
+    if fmt == "ndjson":
+        return _iter_ndjson(fp)
+    if fmt == "opml":
+        return _iter_opml(fp)
+    return _iter_json_array(fp)
+
+def _is_valid(article):
+    if not isinstance(article, dict) or not article.get("title"):
+        return False
+    url = article.get("url")
+    return isinstance(url, str) and urlsplit(url.strip()).scheme.lower() in ("http", "https")
+
+
+# ---------------- WRITERS ----------------
+class _ArrayWriter:
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+        out.write("[")
+
+    def write_many(self, articles):
+        if not articles:
+            return
+        parts = []
+        for article in articles:
+            parts.append(",\n    " if self.count else "\n    ")
+            parts.append(json.dumps(article))
+            self.count += 1
+        self.out.write("".join(parts))
+
+    def close(self):
+        self.out.write("\n]\n" if self.count else "]\n")
+
+
+# ---------------- REWRITE ----------------
+@contextmanager
+def _rewrite(path):
+    # Yields (existing articles, writer) and swaps the new file in only if
+    # the block completes; the temp file is unique per call
+    with _write_lock:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), prefix=".bookmarks-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                writer = _ArrayWriter(out)
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8-sig") as existing:
+                        yield _iter_json_array(existing), writer
+                else:
+                    yield (), writer
+                writer.close()
+            # mkstemp files are owner-only; keep bookmarks.json readable
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# ---------------- IMPORT ----------------
+def import_bookmarks(fp, fmt="json", path=BOOKMARK_FILE, chunk_size=IMPORT_CHUNK):
+    # "fp" must be a text stream (OPML may also be binary)
+    summary = {"added": 0, "duplicates": 0, "invalid": 0}
+    seen = set()
+
+    with _rewrite(path) as (existing, writer):
+        chunk = []
+        for article in existing:
+            key = _dedupe_key(article.get("url")) if isinstance(article, dict) else None
+            if key:
+                seen.add(key)
+            chunk.append(article)
+            if len(chunk) >= chunk_size:
+                writer.write_many(chunk)
+                chunk = []
+        writer.write_many(chunk)
+
+        chunk = []
+        for article in iter_bookmarks(fp, fmt):
+            key = _dedupe_key(article["url"]) if _is_valid(article) else None
+            if key is None:
+                summary["invalid"] += 1
+                continue
+            if key in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(key)
+            chunk.append(article)
+            summary["added"] += 1
+            if len(chunk) >= chunk_size:
+                writer.write_many(chunk)
+                chunk = []
+        writer.write_many(chunk)
+
+    return summary
+
+def add_bookmark(article, path=BOOKMARK_FILE, chunk_size=IMPORT_CHUNK):
+    # Single-card Save: re-reads the file under the write lock so entries
+    # added by other sessions (or a bulk import) are never overwritten
+    key = _dedupe_key(article.get("url"))
+    added = False
+    with _rewrite(path) as (existing, writer):
+        chunk = []
+        for saved in existing:
+            if key and isinstance(saved, dict) and _dedupe_key(saved.get("url")) == key:
+                key = None
+            chunk.append(saved)
+            if len(chunk) >= chunk_size:
+                writer.write_many(chunk)
+                chunk = []
+        if key:
+            chunk.append(article)
+            added = True
+        writer.write_many(chunk)
+    return added
+
+def remove_bookmark(url, path=BOOKMARK_FILE, chunk_size=IMPORT_CHUNK):
+    removed = False
+    with _rewrite(path) as (existing, writer):
+        chunk = []
+        for article in existing:
+            if not removed and isinstance(article, dict) and article.get("url") == url:
+                removed = True
+                continue
+            chunk.append(article)
+            if len(chunk) >= chunk_size:
+                writer.write_many(chunk)
+                chunk = []
+        writer.write_many(chunk)
+    return removed
+
+def iter_saved_bookmarks(path=BOOKMARK_FILE):
+    # Streams bookmarks.json; a generator so the file closes when done
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for article in _iter_json_array(f):
+            if isinstance(article, dict):
+                yield article
+
+
+# ---------------- EXPORT ----------------
+def export_bookmarks(out, fmt="json", path=BOOKMARK_FILE):
+    articles = iter_saved_bookmarks(path)
+    try:
+        if fmt == "ndjson":
+            for article in articles:
+                out.write(json.dumps(article) + "\n")
+        elif fmt == "opml":
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            out.write('<opml version="2.0">\n<head><title>HeadLine Hub Bookmarks</title></head>\n<body>\n')
+            for article in articles:
+                source = article.get("source")
+                attrs = {
+                    "type": "link",
+                    "text": article.get("title"),
+                    "title": article.get("title"),
+                    "url": article.get("url"),
+                    "description": article.get("description"),
+                    "source": source.get("name") if isinstance(source, dict) else None,
+                    "image": article.get("urlToImage"),
+                    "created": article.get("publishedAt"),
+                }
+                out.write(
+                    "  <outline "
+                    + " ".join(f"{k}={quoteattr(str(v))}" for k, v in attrs.items() if v)
+                    + "/>\n"
+                )
+            out.write("</body>\n</opml>\n")
+        else:
+            writer = _ArrayWriter(out)
+            chunk = []
+            for article in articles:
+                chunk.append(article)
+                if len(chunk) >= IMPORT_CHUNK:
+                    writer.write_many(chunk)
+                    chunk = []
+            writer.write_many(chunk)
+            writer.close()
+    finally:
+        articles.close()
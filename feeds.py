@@ -0,0 +1,235 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import MappingProxyType
+
+import streamlit as st
+
+from resilience import UpstreamError, get_json
+from trending import get_trending_tracker
+
+# ---------------- SHARED FEED STORE ----------------
+# One process-wide store of ranked headline feeds keyed by
+# (country, category) or publisher. st.cache_data pickles a fresh copy of
+# the result into every rerun; st.cache_resource hands every session the
+# same object, so feeds are held once and read as immutable tuples of
+# read-only articles. Use thaw_article() before storing one anywhere.
+BASE_URL = "https://newsapi.org/v2/top-headlines"
+
+# Seconds a feed is served before refreshing, matching the st.cache_data
+# TTLs these calls had before: Home cached everything for an hour, Publisher
+# Gallery its publisher feeds for 30 minutes. A reader can ask for a
+# shorter max_age on a shared feed.
+FEED_TTLS = {"headlines": 3600, "publisher": 3600}
+FEED_SIZE = 20
+MAX_FEED_BYTES = 32 * 1024 * 1024
+
+# Popularity is a decaying count: halved every HIT_HALF_LIFE seconds so a
+# feed that was busy yesterday doesn't outrank today's
+HIT_HALF_LIFE = 600
+MIN_HITS = 0.5
+
+# Only the fields the cards actually render
+ARTICLE_FIELDS = ("title", "description", "url", "urlToImage", "publishedAt")
+
+# Longest a page waits on a batch of publisher feeds. Each upstream call
+# may take up to resilience.REQUEST_DEADLINE; a feed that isn't back in
+# time keeps refreshing in the background and shows up on the next rerun.
+RENDER_BUDGET = 4
+FETCH_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="feeds")
+
+
+def _feed_key(source_id=None, country="us", category="general"):
+    if source_id:
+        return ("publisher", source_id)
+    return ("headlines", country, category or "general")
+
+def _compact(article):
+    slim = {field: article.get(field) for field in ARTICLE_FIELDS}
+    source = article.get("source") or {}
+    slim["source"] = MappingProxyType({"id": source.get("id"), "name": source.get("name")})
+    return MappingProxyType(slim)
+
+def thaw_article(article):
+    # Plain, independent copy of a store article (e.g. for bookmarks.json)
+    thawed = dict(article)
+    thawed["source"] = dict(article.get("source") or {})
+    return thawed
+
+def _rank(articles):
+    articles = [_compact(a) for a in articles if a.get("url") and a.get("title")]
+    articles = list({a["url"]: a for a in articles}.values())
+    articles.sort(key=lambda a: a.get("publishedAt") or "", reverse=True)
+    return tuple(articles)
+
+def _snapshot_size(articles):
+    return sum(
+        len(a["url"])
+        + len(a["title"])
+        + len(a.get("description") or "")
+        + len(a.get("urlToImage") or "")
+        + 200
+        for a in articles
+    )
+
+
+class FeedSnapshot:
+    __slots__ = ("articles", "fetched_at", "size", "last_error_at")
+
+    def __init__(self, articles):
+        self.articles = articles
+        self.fetched_at = time.time()
+        self.size = _snapshot_size(articles)
+        # Set when a refresh of this feed fails; a fresh snapshot replaces it
+        self.last_error_at = None
+
+
+class FeedStore:
+    def __init__(self, api_key, ttls=FEED_TTLS, max_bytes=MAX_FEED_BYTES, on_fetch=None):
+        self.api_key = api_key
+        self.on_fetch = on_fetch
+        self.ttls = dict(ttls)
+        self.max_bytes = max_bytes
+        self._snapshots = {}
+        self._hits = {}
+        self._refresh_locks = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._decayed_at = time.time()
+
+    # ---------------- READ ----------------
+    def headlines(self, country="us", category="general", max_age=None):
+        params = {"country": country}
+        if category and category != "general":
+            params["category"] = category
+        return self._get(_feed_key(country=country, category=category), params, max_age)
+
+    def publisher(self, source_id, max_age=None):
+        return self._get(_feed_key(source_id=source_id), {"sources": source_id}, max_age)
+
+    def publishers(self, source_ids, max_age=None, budget=RENDER_BUDGET):
+        # Returns ({source_id: articles}, [source_ids still loading]).
+        # Feeds refresh in parallel; one that misses the budget is served
+        # from its previous snapshot, or left empty if there is none yet.
+        futures = {s: _executor.submit(self.publisher, s, max_age) for s in source_ids}
+        wait(futures.values(), timeout=budget)
+
+        feeds, pending = {}, []
+        for source_id, future in futures.items():
+            if future.done():
+                feeds[source_id] = future.result()
+                continue
+            with self._lock:
+                snapshot = self._snapshots.get(_feed_key(source_id=source_id))
+            feeds[source_id] = snapshot.articles if snapshot else ()
+            if not snapshot:
+                pending.append(source_id)
+        return feeds, pending
+
+    def stale_since(self, source_id=None, country="us", category="general"):
+        # Fetch time of a feed we are serving because its last refresh
+        # failed, else None. A refresh merely in progress is not stale.
+        with self._lock:
+            snapshot = self._snapshots.get(_feed_key(source_id, country, category))
+        if snapshot and snapshot.last_error_at:
+            return snapshot.fetched_at
+        return None
+
+    def _get(self, key, params, max_age=None):
+        ttl = self.ttls[key[0]]
+        if max_age:
+            ttl = min(ttl, max_age)
+        with self._lock:
+            self._decay()
+            self._hits[key] = self._hits.get(key, 0) + 1
+            snapshot = self._snapshots.get(key)
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+
+        if snapshot and time.time() - snapshot.fetched_at < ttl:
+            return snapshot.articles
+
+        # Single-flight: one session refreshes a stale key while the rest
+        # keep reading the previous snapshot instead of queueing upstream.
+        if not refresh_lock.acquire(blocking=snapshot is None):
+            return snapshot.articles
+        try:
+            with self._lock:
+                current = self._snapshots.get(key)
+            if current and time.time() - current.fetched_at < ttl:
+                return current.articles
+
+            articles = self._fetch(params)
+            if articles is None:
+                if current:
+                    current.last_error_at = time.time()
+                    return current.articles
+                return ()
+
+            if self.on_fetch:
+                self.on_fetch(articles)
+
+            fresh = FeedSnapshot(_rank(articles))
+            self._store(key, fresh)
+            return fresh.articles
+        finally:
+            refresh_lock.release()
+
+    def _decay(self):
+        # Caller holds self._lock
+        now = time.time()
+        halvings = int((now - self._decayed_at) // HIT_HALF_LIFE)
+        if not halvings:
+            return
+        self._decayed_at += halvings * HIT_HALF_LIFE
+        factor = 0.5 ** halvings
+        for key in list(self._hits):
+            self._hits[key] *= factor
+            if self._hits[key] < MIN_HITS and key not in self._snapshots:
+                del self._hits[key]
+
+        # Drop refresh locks for keys we no longer hold or track
+        for key in list(self._refresh_locks):
+            if key not in self._snapshots and key not in self._hits and not self._refresh_locks[key].locked():
+                del self._refresh_locks[key]
+
+    # ---------------- UPSTREAM ----------------
+    def _fetch(self, params):
+        # On failure the previous snapshot stays in place as last-known-good
+        params = dict(params, pageSize=FEED_SIZE, apiKey=self.api_key)
+        try:
+            data = get_json("top-headlines", BASE_URL, params)
+        except UpstreamError:
+            return None
+        return data.get("articles", [])
+
+    # ---------------- MEMORY BUDGET ----------------
+    def _store(self, key, snapshot):
+        with self._lock:
+            previous = self._snapshots.get(key)
+            if previous:
+                self._bytes -= previous.size
+            self._snapshots[key] = snapshot
+            self._bytes += snapshot.size
+
+            if self._bytes <= self.max_bytes:
+                return
+
+            # Evict the least-requested feeds first; the feed just stored
+            # is kept so the caller always gets an answer.
+            for victim in sorted(self._snapshots, key=lambda k: self._hits.get(k, 0)):
+                if self._bytes <= self.max_bytes:
+                    break
+                if victim == key:
+                    continue
+                self._bytes -= self._snapshots.pop(victim).size
+                self._hits.pop(victim, None)
+
+
+@st.cache_resource
+def get_feed_store():
+    return FeedStore(
+        st.secrets["NEWS_API_KEY"],
+        on_fetch=get_trending_tracker().observe
+    )
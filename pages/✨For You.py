@@ -1,8 +1,12 @@
 import streamlit as st
-import requests
+import html
 import json
 import os
+import time
 from datetime import datetime, timezone
+from resilience import get_json, stale_notice, with_fallback
+from trending import get_trending_tracker, rank_interest_terms
+from thumbnails import thumbnail_url, prefetch_thumbnails
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(layout="wide")
@@ -49,7 +53,7 @@ BOOKMARK_FILE = "bookmarks.json"
 
 def load_bookmarks():
     if os.path.exists(BOOKMARK_FILE):
-        with open(BOOKMARK_FILE, "r") as f:
+        with open(BOOKMARK_FILE, "r", encoding="utf-8-sig") as f:
             return json.load(f)
     return []
 
@@ -75,28 +79,37 @@ def time_ago(published_at):
 API_KEY = st.secrets["NEWS_API_KEY"]
 
 @st.cache_data(ttl=1800)
-def fetch_articles(query):
-    url = (
-        "https://newsapi.org/v2/everything?"
-        f"q={query}&language=en&pageSize=10&apiKey={API_KEY}"
+def _fetch_articles(query):
+    # Raises on failure so errors are never cached
+    data = get_json(
+        "everything",
+        "https://newsapi.org/v2/everything",
+        {"q": query, "language": "en", "pageSize": 10, "apiKey": API_KEY}
     )
-    data = requests.get(url).json()
-    return data.get("articles", []) if data.get("status") == "ok" else []
+    articles = data.get("articles", [])
+    get_trending_tracker().observe(articles)
+    return articles, time.time()
+
+def fetch_articles(query):
+    return with_fallback(("for_you", query), _fetch_articles, query)
 
 # ---------------- BUILD INTEREST TERMS ----------------
 interest_terms = []
 
-# From saved articles (strong signal)
-for article in bookmarks:
-    if article.get("title"):
-        interest_terms.extend(article["title"].split()[:2])
+# From saved articles (strong signal), favouring entities and phrases
+# that are trending right now
+interest_terms.extend(rank_interest_terms(
+    [article.get("title") for article in bookmarks],
+    get_trending_tracker(),
+    n=4
+))
 
 # From categories
 for cat, count in st.session_state.user_profile["category_clicks"].items():
     if count >= 2:
         interest_terms.append(cat)
 
-interest_terms = list(set(interest_terms))[:5]
+interest_terms = list(dict.fromkeys(interest_terms))[:5]
 
 if not interest_terms:
     st.info("Interact with articles to personalize your feed ✨")
@@ -104,8 +117,12 @@ if not interest_terms:
 
 # ---------------- FETCH PERSONALIZED ARTICLES ----------------
 articles = []
+stale_since = None
 for term in interest_terms:
-    articles.extend(fetch_articles(term))
+    term_articles, term_stale = fetch_articles(term)
+    articles.extend(term_articles)
+    if term_stale:
+        stale_since = min(stale_since or term_stale, term_stale)
 
 # Deduplicate
 unique_articles = list({a["url"]: a for a in articles}.values())[:15]
@@ -113,18 +130,23 @@ unique_articles = list({a["url"]: a for a in articles}.values())[:15]
 # ---------------- DISPLAY ----------------
 st.markdown("<div class='article-container'>", unsafe_allow_html=True)
 
+if stale_since:
+    st.warning(stale_notice(stale_since))
+
 if not unique_articles:
     st.markdown("<div class='empty-card'>No personalized articles yet.</div>", unsafe_allow_html=True)
 
+prefetch_thumbnails(unique_articles)
+
 for article in unique_articles:
     reason = get_reason(article, st.session_state.user_profile)
 
     st.markdown(
         f"""
         <div class="article-card">
-            {'<img src="' + article['urlToImage'] + '">' if article.get('urlToImage') else ''}
-            <h3><a href="{article['url']}" target="_blank">{article['title']}</a></h3>
-            <p>{article.get('description','')}</p>
+            {'<img src="' + thumbnail_url(article['urlToImage']) + '">' if article.get('urlToImage') else ''}
+            <h3><a href="{html.escape(article['url'])}" target="_blank">{html.escape(article.get('title') or '')}</a></h3>
+            <p>{html.escape(article.get('description') or '')}</p>
             <small class="time-ago">{time_ago(article.get("publishedAt"))}</small>
             <div class="why-text">🧠 {reason}</div>
         </div>
@@ -1,8 +1,13 @@
 import streamlit as st
-import requests
+import html
 import json
 import os
+import time
 from datetime import datetime, timezone
+from resilience import get_json, stale_notice, with_fallback
+from feeds import get_feed_store, thaw_article
+from bookmark_io import add_bookmark
+from thumbnails import thumbnail_url, prefetch_thumbnails
 
 
 
@@ -114,14 +119,10 @@ BOOKMARK_FILE = "bookmarks.json"
 
 def load_bookmarks():
     if os.path.exists(BOOKMARK_FILE):
-        with open(BOOKMARK_FILE, "r") as f:
+        with open(BOOKMARK_FILE, "r", encoding="utf-8-sig") as f:
             return json.load(f)
     return []
 
-def save_bookmarks(data):
-    with open(BOOKMARK_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
 if "bookmarks" not in st.session_state:
     st.session_state.bookmarks = load_bookmarks()
 
@@ -132,30 +133,23 @@ def article_exists(article):
 API_KEY = st.secrets["NEWS_API_KEY"]
 
 @st.cache_data(ttl=86400)
+def _fetch_sources():
+    data = get_json("sources", "https://newsapi.org/v2/sources", {"apiKey": API_KEY})
+    return data.get("sources", []), time.time()
+
 def fetch_sources():
-    url = f"https://newsapi.org/v2/sources?apiKey={API_KEY}"
-    try:
-        data = requests.get(url).json()
-        return data["sources"] if data.get("status") == "ok" else []
-    except:
-        return []
-
-@st.cache_data(ttl=1800)
+    return with_fallback(("sources",), _fetch_sources)
+
+feed_store = get_feed_store()
+
 def fetch_publisher_news(source_id):
-    url = (
-        "https://newsapi.org/v2/top-headlines?"
-        f"sources={source_id}&"
-        "pageSize=15&"
-        f"apiKey={API_KEY}"
-    )
-    try:
-        data = requests.get(url).json()
-        return data.get("articles", []) if data.get("status") == "ok" else []
-    except:
-        return []
+    return feed_store.publisher(source_id, max_age=1800)[:15]
 
 # ---------------- COUNTRY FILTER ----------------
-sources = fetch_sources()
+sources, sources_stale_since = fetch_sources()
+
+if sources_stale_since:
+    st.warning(stale_notice(sources_stale_since, what="the publisher list"))
 
 countries = sorted(set(s["country"] for s in sources))
 selected_country = st.selectbox(
@@ -199,22 +193,28 @@ track_publisher(source_id)
 st.caption(f"Browsing publishers from **{publisher['country'].upper()}**")
 
 articles = fetch_publisher_news(source_id)
+stale_since = feed_store.stale_since(source_id=source_id)
 
 st.markdown("<div class='article-container'>", unsafe_allow_html=True)
 
+if stale_since:
+    st.warning(stale_notice(stale_since))
+
 if not articles:
     st.markdown(
         "<div class='empty-card'>No recent articles available from this publisher.</div>",
         unsafe_allow_html=True
     )
 
+prefetch_thumbnails(articles)
+
 for i, article in enumerate(articles):
     st.markdown(
         f"""
         <div class="article-card">
-            {'<img src="'+article['urlToImage']+'">' if article.get('urlToImage') else ''}
-            <h3><a href="{article['url']}" target="_blank">{article['title']}</a></h3>
-            <p>{article.get('description','')}</p>
+            {'<img src="' + thumbnail_url(article['urlToImage']) + '">' if article.get('urlToImage') else ''}
+            <h3><a href="{html.escape(article['url'])}" target="_blank">{html.escape(article.get('title') or '')}</a></h3>
+            <p>{html.escape(article.get('description') or '')}</p>
             <small class="time-ago">{time_ago(article.get("publishedAt"))}</small>
         """,
         unsafe_allow_html=True
@@ -222,9 +222,11 @@ for i, article in enumerate(articles):
 
     if not article_exists(article):
         if st.button("Save", key=f"p_{source_id}_{i}"):
-            st.session_state.bookmarks.append(article)
-            save_bookmarks(st.session_state.bookmarks)
-            st.session_state.user_profile["saved_count"] += 1
+            # Locked re-read of bookmarks.json so other sessions' saves survive
+            saved = thaw_article(article)
+            if add_bookmark(saved):
+                st.session_state.user_profile["saved_count"] += 1
+            st.session_state.bookmarks.append(saved)
             st.success("Saved!")
     else:
         st.caption("✔ Bookmarked")
@@ -1,8 +1,13 @@
 import streamlit as st
-import requests
+import html
 import json
 import os
+import time
 from datetime import datetime, timezone
+from resilience import get_json, stale_notice, with_fallback
+from trending import get_trending_tracker
+from bookmark_io import add_bookmark
+from thumbnails import thumbnail_url, prefetch_thumbnails
 
 st.set_page_config(layout="wide")
 
@@ -37,14 +42,10 @@ BOOKMARK_FILE = "bookmarks.json"
 
 def load_bookmarks():
     if os.path.exists(BOOKMARK_FILE):
-        with open(BOOKMARK_FILE, "r") as f:
+        with open(BOOKMARK_FILE, "r", encoding="utf-8-sig") as f:
             return json.load(f)
     return []
 
-def save_bookmarks(bookmarks):
-    with open(BOOKMARK_FILE, "w") as f:
-        json.dump(bookmarks, f, indent=4)
-
 if "bookmarks" not in st.session_state:
     st.session_state.bookmarks = load_bookmarks()
 
@@ -73,19 +74,19 @@ def time_ago(published_at):
 # ---------------- API ----------------
 API_KEY = st.secrets["NEWS_API_KEY"]
 @st.cache_data(ttl=900)
-def search_articles(query):
-    url = (
-        "https://newsapi.org/v2/everything?"
-        f"q={query}&"
-        "language=en&"
-        "pageSize=20&"
-        f"apiKey={API_KEY}"
+def _search_articles(query):
+    # Raises on failure so errors are never cached
+    data = get_json(
+        "everything",
+        "https://newsapi.org/v2/everything",
+        {"q": query, "language": "en", "pageSize": 20, "apiKey": API_KEY}
     )
-    try:
-        data = requests.get(url).json()
-        return data.get("articles", []) if data.get("status") == "ok" else []
-    except:
-        return []
+    articles = data.get("articles", [])
+    get_trending_tracker().observe(articles)
+    return articles, time.time()
+
+def search_articles(query):
+    return with_fallback(("search", query), _search_articles, query)
 
 # ---------------- UI ----------------
 st.markdown("<h1 class='main-title'>Explore</h1>", unsafe_allow_html=True)
@@ -96,13 +97,18 @@ query = st.text_input("Search for news", placeholder="AI, elections, health...")
 if query and len(query) >= 3:
     track_search(query)
 
-    articles = search_articles(query)
+    articles, stale_since = search_articles(query)
 
     st.markdown("<div class='article-container'>", unsafe_allow_html=True)
 
+    if stale_since:
+        st.warning(stale_notice(stale_since))
+
     if not articles:
         st.markdown("<div class='empty-card'>No articles found.</div>", unsafe_allow_html=True)
 
+    prefetch_thumbnails(articles)
+
     for idx, article in enumerate(articles):
         source_id = article.get("source", {}).get("id")
         track_publisher(source_id)
@@ -110,9 +116,9 @@ if query and len(query) >= 3:
         st.markdown(
             f"""
             <div class="article-card">
-                {'<img src="' + article['urlToImage'] + '">' if article.get('urlToImage') else ''}
-                <h3><a href="{article['url']}" target="_blank">{article['title']}</a></h3>
-                <p>{article.get('description','')}</p>
+                {'<img src="' + thumbnail_url(article['urlToImage']) + '">' if article.get('urlToImage') else ''}
+                <h3><a href="{html.escape(article['url'])}" target="_blank">{html.escape(article.get('title') or '')}</a></h3>
+                <p>{html.escape(article.get('description') or '')}</p>
                 <small>{time_ago(article.get("publishedAt"))}</small>
             </div>
             """,
@@ -121,9 +127,11 @@ if query and len(query) >= 3:
 
         if not article_exists(article):
             if st.button("Save", key=f"s_{idx}"):
-                st.session_state.bookmarks.append(article)
-                save_bookmarks(st.session_state.bookmarks)
-                st.session_state.user_profile["saved_count"] += 1
+                # Locked re-read of bookmarks.json so other sessions' saves survive
+                saved = article
+                if add_bookmark(saved):
+                    st.session_state.user_profile["saved_count"] += 1
+                st.session_state.bookmarks.append(saved)
                 st.success("Saved!")
         else:
             st.caption("✔ Already bookmarked")
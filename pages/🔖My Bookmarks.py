@@ -1,6 +1,13 @@
 import streamlit as st
-import json
-import os
+import html
+import io
+import tempfile
+from itertools import islice
+from bookmark_io import (
+    FORMATS, detect_format, export_bookmarks, import_bookmarks,
+    iter_saved_bookmarks, remove_bookmark
+)
+from thumbnails import thumbnail_url, prefetch_thumbnails
 
 st.set_page_config(layout="wide")
 
@@ -10,8 +17,6 @@ def load_css():
 
 load_css()
 
-BOOKMARK_FILE = "bookmarks.json"
-
 # ---------------- USER PROFILE (FOR YOU DATA) ----------------
 if "user_profile" not in st.session_state:
     st.session_state.user_profile = {
@@ -21,20 +26,64 @@ if "user_profile" not in st.session_state:
         "saved_count": 0
     }
 
-def load_bookmarks():
-    if os.path.exists(BOOKMARK_FILE):
-        with open(BOOKMARK_FILE, "r") as f:
-            return json.load(f)
-    return []
+PAGE_SIZE = 20
 
-def save_bookmarks(bookmarks):
-    with open(BOOKMARK_FILE, "w") as f:
-        json.dump(bookmarks, f, indent=4)
+if "bookmark_page" not in st.session_state:
+    st.session_state.bookmark_page = 0
 
 st.markdown("<h1 class='main-title'>Bookmarks</h1>", unsafe_allow_html=True)
 st.write("Your saved articles.")
 
-bookmarks = load_bookmarks()
+# ---------------- IMPORT / EXPORT ----------------
+with st.expander("Import / Export bookmarks"):
+    uploaded = st.file_uploader(
+        "Import from JSON, NDJSON or OPML",
+        type=["json", "ndjson", "jsonl", "opml", "xml"]
+    )
+    if uploaded and st.button("Import", key="bulk_import"):
+        try:
+            summary = import_bookmarks(
+                io.TextIOWrapper(uploaded, encoding="utf-8-sig"),
+                detect_format(uploaded.name)
+            )
+        except (ValueError, SyntaxError) as e:
+            st.error(f"Could not import file: {e}")
+        else:
+            # Other pages reload bookmarks.json lazily when they next need
+            # it, so "Already bookmarked" reflects the imported entries
+            st.session_state.pop("bookmarks", None)
+            st.session_state.user_profile["saved_count"] += summary["added"]
+            st.success(
+                f"Imported {summary['added']} bookmarks "
+                f"({summary['duplicates']} duplicates, {summary['invalid']} invalid skipped)."
+            )
+
+    export_format = st.selectbox("Export format", FORMATS, key="bulk_export_format")
+    # Only build the export when asked; the download button needs the
+    # whole payload, so it's spooled to disk first and read once
+    if st.button("Prepare export", key="bulk_export_prepare"):
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as export_file:
+            export_bookmarks(export_file, export_format)
+            export_file.seek(0)
+            st.download_button(
+                "Download",
+                data=export_file.read(),
+                file_name=f"bookmarks.{export_format}",
+                key="bulk_export"
+            )
+
+# ---------------- BOOKMARK LIST (PAGINATED) ----------------
+page = st.session_state.bookmark_page
+saved = iter_saved_bookmarks()
+# One extra entry tells us whether there is a next page
+bookmarks = list(islice(saved, page * PAGE_SIZE, (page + 1) * PAGE_SIZE + 1))
+saved.close()
+has_next = len(bookmarks) > PAGE_SIZE
+bookmarks = bookmarks[:PAGE_SIZE]
+
+if not bookmarks and page > 0:
+    st.session_state.bookmark_page = 0
+    st.rerun()
 
 if not bookmarks:
     st.markdown(
@@ -44,24 +93,41 @@ if not bookmarks:
 else:
     st.markdown("<div class='article-container'>", unsafe_allow_html=True)
 
+    prefetch_thumbnails(bookmarks)
+
     for idx, article in enumerate(bookmarks):
         st.markdown(
             f"""
             <div class="article-card">
-                {'<img src="' + article['urlToImage'] + '">' if article.get('urlToImage') else ''}
-                <h3><a href="{article['url']}" target="_blank">{article['title']}</a></h3>
-                <p>{article.get('description','')}</p>
+                {'<img src="' + thumbnail_url(article['urlToImage']) + '">' if article.get('urlToImage') else ''}
+                <h3><a href="{html.escape(article.get('url') or '')}" target="_blank">{html.escape(article.get('title') or '')}</a></h3>
+                <p>{html.escape(article.get('description') or '')}</p>
             </div>
             """,
             unsafe_allow_html=True
         )
 
-        if st.button("❌ Remove", key=f"rm_{idx}"):
-            bookmarks.pop(idx)
-            save_bookmarks(bookmarks)
-            st.session_state.user_profile["saved_count"] = max(
-                0, st.session_state.user_profile["saved_count"] - 1
-            )
-            
+        if st.button("❌ Remove", key=f"rm_{page}_{idx}"):
+            if remove_bookmark(article.get("url")):
+                if "bookmarks" in st.session_state:
+                    st.session_state.bookmarks = [
+                        a for a in st.session_state.bookmarks if a.get("url") != article.get("url")
+                    ]
+                st.session_state.user_profile["saved_count"] = max(
+                    0, st.session_state.user_profile["saved_count"] - 1
+                )
+                st.rerun()
 
     st.markdown("</div>", unsafe_allow_html=True)
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if page > 0 and st.button("← Previous", key="bm_prev", use_container_width=True):
+            st.session_state.bookmark_page -= 1
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {page + 1}")
+    with next_col:
+        if has_next and st.button("Next →", key="bm_next", use_container_width=True):
+            st.session_state.bookmark_page += 1
+            st.rerun()
@@ -0,0 +1,200 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+# ---------------- UPSTREAM RESILIENCE ----------------
+# All NewsAPI calls go through get_json(): bounded timeouts, a few jittered
+# retries and a circuit breaker per endpoint, so an outage costs one fast
+# failure per rerun instead of a hung socket. Failures raise instead of
+# returning [], which keeps st.cache_data from caching them, and
+# with_fallback() serves the last good payload in the meantime.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 6
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.3
+BACKOFF_CAP = 2.0
+REQUEST_DEADLINE = 10
+
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 60
+
+MAX_LAST_GOOD = 500
+
+# NewsAPI error codes that mean upstream is in trouble. Only transient
+# ones are retried; rateLimited means the quota is spent, so retrying just
+# burns more calls. Any other code is a bad request and upstream is fine.
+RETRYABLE_CODES = ("unexpectedError",)
+UPSTREAM_FAILURE_CODES = ("rateLimited", "apiKeyExhausted", "unexpectedError")
+
+# _attempt outcomes
+RETRY = "retry"
+FAIL = "fail"
+BAD_REQUEST = "bad_request"
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+# ---------------- CIRCUIT BREAKER ----------------
+class CircuitBreaker:
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, open_seconds=OPEN_SECONDS):
+        self.name = name
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.open_seconds:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open":
+                raise CircuitOpenError(f"{self.name} circuit open")
+            if state == "half-open":
+                # Let a single probe through; everyone else keeps failing fast
+                if self._trial_running:
+                    raise CircuitOpenError(f"{self.name} circuit half-open")
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = time.time()
+            self._trial_running = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(endpoint):
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(endpoint)
+        return _breakers[endpoint]
+
+
+# ---------------- REQUESTS ----------------
+def _backoff(attempt):
+    # Full jitter keeps sessions from retrying in lockstep
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def _attempt(url, params, remaining):
+    # Returns (data, outcome, error); data is None unless the call worked
+    timeout = (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+    try:
+        response = requests.get(url, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        return None, RETRY, e
+
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        outcome = RETRY if response.status_code >= 500 else FAIL
+        return None, outcome, UpstreamError(f"HTTP {response.status_code}: unexpected body")
+
+    if data.get("status") == "ok":
+        return data, None, None
+
+    code = data.get("code")
+    error = UpstreamError(data.get("message") or code or f"HTTP {response.status_code}")
+    if response.status_code >= 500 or code in RETRYABLE_CODES:
+        return None, RETRY, error
+    if response.status_code == 429 or code in UPSTREAM_FAILURE_CODES:
+        return None, FAIL, error
+    return None, BAD_REQUEST, error
+
+def get_json(endpoint, url, params=None):
+    breaker = get_breaker(endpoint)
+    # A half-open probe gets a single attempt
+    attempts = 1 if breaker.before_call() else MAX_ATTEMPTS
+
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    error = None
+    try:
+        for attempt in range(attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            data, outcome, error = _attempt(url, params, remaining)
+            if data is not None:
+                breaker.record_success()
+                return data
+            if outcome == BAD_REQUEST:
+                # The request itself was bad; upstream is healthy
+                breaker.record_success()
+                raise UpstreamError(f"{endpoint}: {error}")
+            if outcome == FAIL or attempt == attempts - 1:
+                break
+            delay = _backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+    except UpstreamError:
+        raise
+    except Exception as e:
+        # Anything unexpected still has to release a half-open probe
+        breaker.record_failure()
+        raise UpstreamError(f"{endpoint}: {e}") from e
+
+    breaker.record_failure()
+    raise UpstreamError(f"{endpoint}: {error}")
+
+
+# ---------------- LAST KNOWN GOOD ----------------
+_last_good = OrderedDict()
+_last_good_lock = threading.Lock()
+
+def with_fallback(key, fn, *args):
+    # fn returns (value, fetched_at) so a cached result keeps the time it
+    # was really fetched. Returns (value, stale_since): stale_since is None
+    # for a live result, or the time the fallback value was fetched.
+    try:
+        value, fetched_at = fn(*args)
+    except UpstreamError:
+        with _last_good_lock:
+            entry = _last_good.get(key)
+        if entry is None:
+            return [], None
+        return entry[0], entry[1]
+
+    with _last_good_lock:
+        _last_good[key] = (value, fetched_at)
+        _last_good.move_to_end(key)
+        if len(_last_good) > MAX_LAST_GOOD:
+            _last_good.popitem(last=False)
+    return value, None
+
+def stale_notice(stale_since, what="headlines"):
+    if not stale_since:
+        return None
+    minutes = int((time.time() - stale_since) // 60)
+    age = "moments" if minutes < 1 else f"{minutes} minute{'s' if minutes > 1 else ''}"
+    return f"⚠ Live news is temporarily unavailable. Showing {what} from {age} ago."
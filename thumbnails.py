@@ -0,0 +1,245 @@
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps, features
+
+# ---------------- THUMBNAIL CACHE ----------------
+# Publisher images are fetched once, cropped to card size and written to
+# static/thumbs, which Streamlit serves at app/static/ when
+# server.enableStaticServing is on (see .streamlit/config.toml).
+STATIC_DIR = "static"
+THUMB_DIR = os.path.join(STATIC_DIR, "thumbs")
+THUMB_URL = "app/static/thumbs"
+PLACEHOLDER_FILE = os.path.join(STATIC_DIR, "placeholder.png")
+PLACEHOLDER_URL = "app/static/placeholder.png"
+
+# Cards are 360x180, so store 2x for high-DPI screens
+THUMB_SIZE = (720, 360)
+THUMB_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMB_EXT = "webp" if THUMB_FORMAT == "WEBP" else "jpg"
+THUMB_QUALITY = 80
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+MAX_SOURCE_BYTES = 15 * 1024 * 1024
+FETCH_TIMEOUT = 3
+DOWNLOAD_DEADLINE = 6
+MAX_REDIRECTS = 3
+FAILURE_TTL = 600
+MAX_FAILURES = 5000
+PREFETCH_WORKERS = 8
+# Longest a page waits for thumbnails before rendering placeholders;
+# unfinished ones keep building in the background for the next rerun
+PREFETCH_BUDGET = 1.5
+
+_lock = threading.Lock()
+_cache_bytes = None
+_failures = {}
+_pending = {}
+# Re-entrant: a done callback can run in the submitting thread
+_pending_lock = threading.RLock()
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="thumbs")
+
+os.makedirs(THUMB_DIR, exist_ok=True)
+
+
+def _ensure_placeholder():
+    if not os.path.exists(PLACEHOLDER_FILE):
+        Image.new("RGB", THUMB_SIZE, (30, 41, 59)).save(PLACEHOLDER_FILE, "PNG")
+
+_ensure_placeholder()
+
+
+def _thumb_name(image_url):
+    return f"{hashlib.sha1(image_url.encode('utf-8')).hexdigest()}.{THUMB_EXT}"
+
+def _resolve(image_url):
+    # urlToImage can come from uploaded bookmark files, so never let it
+    # point the server at loopback, private or metadata addresses. Returns
+    # the checked address so the connection can be pinned to it.
+    parts = urlsplit(image_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("unsupported image URL")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    addresses = [
+        ipaddress.ip_address(sockaddr[0].split("%")[0])
+        for *_, sockaddr in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    ]
+    if not addresses or any(not ip.is_global or ip.is_multicast for ip in addresses):
+        raise ValueError("image host is not public")
+    return parts, addresses[0]
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    # We connect to an IP, but TLS (SNI and certificate checks) still has
+    # to use the real hostname
+    def __init__(self, hostname, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self.hostname
+        kwargs["assert_hostname"] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _pinned_url(parts, ip):
+    host = f"[{ip}]" if ip.version == 6 else str(ip)
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    return urlunsplit((parts.scheme, host, parts.path or "/", parts.query, ""))
+
+def _download(image_url):
+    deadline = time.monotonic() + DOWNLOAD_DEADLINE
+    buf = io.BytesIO()
+
+    # Follow redirects by hand so every hop is checked, and connect to the
+    # address we checked rather than resolving the host a second time
+    # (DNS rebinding). trust_env=False keeps HTTP(S)_PROXY out of it.
+    for _ in range(MAX_REDIRECTS + 1):
+        parts, ip = _resolve(image_url)
+        with requests.Session() as session:
+            session.trust_env = False
+            session.mount("https://", _PinnedHostAdapter(parts.hostname))
+            with session.get(
+                _pinned_url(parts, ip),
+                headers={"Host": parts.netloc.rsplit("@", 1)[-1]},
+                stream=True,
+                timeout=FETCH_TIMEOUT,
+                allow_redirects=False
+            ) as response:
+                if response.is_redirect:
+                    image_url = urljoin(image_url, response.headers["Location"])
+                    continue
+                response.raise_for_status()
+                for chunk in response.iter_content(64 * 1024):
+                    buf.write(chunk)
+                    if buf.tell() > MAX_SOURCE_BYTES:
+                        raise ValueError("image too large")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError("image download too slow")
+        buf.seek(0)
+        return buf
+
+    raise ValueError("too many redirects")
+
+def _render(buf, path):
+    with Image.open(buf) as img:
+        # Let the JPEG decoder downscale while decoding
+        img.draft("RGB", THUMB_SIZE)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        thumb = ImageOps.fit(img, THUMB_SIZE, Image.LANCZOS)
+
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    thumb.save(tmp_path, THUMB_FORMAT, quality=THUMB_QUALITY)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+# ---------------- LRU EVICTION ----------------
+def _scan_cache():
+    entries = []
+    for name in os.listdir(THUMB_DIR):
+        try:
+            stat = os.stat(os.path.join(THUMB_DIR, name))
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+    return entries
+
+def _record_write(size):
+    global _cache_bytes
+    with _lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, size, _ in _scan_cache())
+        else:
+            _cache_bytes += size
+
+        if _cache_bytes <= MAX_CACHE_BYTES:
+            return
+
+        # Hits bump mtime, so oldest mtime == least recently used.
+        # Trim to 90% so we don't evict on every write once full.
+        entries = sorted(_scan_cache())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= MAX_CACHE_BYTES * 0.9:
+                break
+            try:
+                os.remove(os.path.join(THUMB_DIR, name))
+                total -= size
+            except OSError:
+                pass
+        _cache_bytes = total
+
+# ---------------- BUILD ----------------
+def _build(image_url, path):
+    try:
+        size = _render(_download(image_url), path)
+    except Exception:
+        _failures[image_url] = time.time()
+        if len(_failures) > MAX_FAILURES:
+            cutoff = time.time() - FAILURE_TTL
+            for url in [u for u, t in list(_failures.items()) if t < cutoff]:
+                _failures.pop(url, None)
+        return False
+
+    _failures.pop(image_url, None)
+    _record_write(size)
+    return True
+
+def _schedule(image_url, path):
+    with _pending_lock:
+        future = _pending.get(image_url)
+        if future is None:
+            future = _executor.submit(_build, image_url, path)
+            _pending[image_url] = future
+            future.add_done_callback(lambda _: _forget(image_url))
+    return future
+
+def _forget(image_url):
+    with _pending_lock:
+        _pending.pop(image_url, None)
+
+def _recently_failed(image_url):
+    failed_at = _failures.get(image_url)
+    return failed_at is not None and time.time() - failed_at < FAILURE_TTL
+
+# ---------------- PUBLIC API ----------------
+def thumbnail_url(image_url):
+    # Never blocks: a thumbnail that isn't on disk yet renders as the
+    # placeholder while it builds in the background
+    if not image_url or not isinstance(image_url, str):
+        return PLACEHOLDER_URL
+
+    name = _thumb_name(image_url)
+    path = os.path.join(THUMB_DIR, name)
+
+    if os.path.exists(path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return f"{THUMB_URL}/{name}"
+
+    if not _recently_failed(image_url):
+        _schedule(image_url, path)
+    return PLACEHOLDER_URL
+
+def prefetch_thumbnails(articles):
+    # Give missing thumbnails a short head start so most cards render
+    # with their image, without letting one slow host hold the page
+    futures = []
+    for image_url in {a.get("urlToImage") for a in articles if isinstance(a.get("urlToImage"), str)}:
+        path = os.path.join(THUMB_DIR, _thumb_name(image_url))
+        if not os.path.exists(path) and not _recently_failed(image_url):
+            futures.append(_schedule(image_url, path))
+    if futures:
+        wait(futures, timeout=PREFETCH_BUDGET)
@@ -0,0 +1,265 @@
+import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
+
+import streamlit as st
+
+# ---------------- TRENDING TERMS ----------------
+# Every headline we fetch anyway is fed through here; nothing in this
+# module calls NewsAPI. Counts live in per-bucket count-min sketches over a
+# sliding window, and a bounded candidate set tracks the heavy hitters so
+# we only ever score terms that could actually be trending.
+BUCKET_SECONDS = 900
+WINDOW_BUCKETS = 16
+RECENT_BUCKETS = 4
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+MAX_CANDIDATES = 2000
+MAX_SEEN_URLS = 20000
+MIN_RECENT_COUNT = 2
+# Share of content words capitalized above which a headline is Title Case
+# and capitalization stops meaning "proper noun"
+TITLE_CASE_SHARE = 0.8
+# Personal terms kept per requested term before consulting the tracker
+SHORTLIST_FACTOR = 5
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because
+been before being below between both but by can could did do does doing down
+during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our out over own same she should so some such than that the
+their them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your
+new says say said after amid over vs via how why what who get gets got one two
+""".split())
+
+# Headline boilerplate that says nothing about the story itself
+NEWS_NOISE = frozenset("""
+breaking live update updates latest news report reports reported video watch
+photos exclusive opinion analysis review today week year years day days first
+time times people man woman could may might still back make makes made take
+""".split())
+
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9'&.-]*[A-Za-z0-9]|[A-Za-z0-9]")
+# NewsAPI appends " - Publisher" to most titles
+_SOURCE_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]+$")
+_CLAUSE_RE = re.compile(r"[,:;!?()\"“”‘’]|\s[-|–—]\s")
+
+
+# ---------------- TERM EXTRACTION ----------------
+def _is_noise(word):
+    return word in STOPWORDS or word in NEWS_NOISE or len(word) < 3 or word.isdigit()
+
+def _is_title_case(words):
+    content = [w for w in words if w[:1].isalpha() and w.lower() not in STOPWORDS]
+    if len(content) < 3:
+        return False
+    capitalized = sum(1 for w in content if w[:1].isupper())
+    return capitalized >= TITLE_CASE_SHARE * len(content)
+
+def extract_terms(title):
+    # Returns {term: kind} where kind is "entity" or "phrase"
+    if not title:
+        return {}
+    title = _SOURCE_SUFFIX_RE.sub("", title)
+    terms = {}
+    # "Fed Holds Rates Steady" capitalizes every word, so only phrases
+    # are taken from it
+    find_entities = not _is_title_case(_WORD_RE.findall(title))
+
+    # Phrases never span punctuation ("rates, Powell" is not a phrase)
+    for n, segment in enumerate(_CLAUSE_RE.split(title)):
+        words = _WORD_RE.findall(segment)
+
+        # Entities: runs of capitalized words ("Federal Reserve", "Taylor Swift")
+        run = []
+        for i, word in enumerate(words + [""] if find_entities else []):
+            lower = word.lower()
+            if word[:1].isupper() and not (lower in STOPWORDS or lower in NEWS_NOISE):
+                run.append(lower)
+                continue
+            # A lone capitalized opener is just sentence case
+            if run and not (len(run) == 1 and i == 1 and n == 0):
+                terms[" ".join(run[:3])] = "entity"
+            run = []
+
+        # Phrases: bigrams of adjacent content words, plus content unigrams
+        lowered = [w.lower() for w in words]
+        for a, b in zip(lowered, lowered[1:]):
+            if not _is_noise(a) and not _is_noise(b):
+                terms.setdefault(f"{a} {b}", "phrase")
+        for word in lowered:
+            if not _is_noise(word):
+                terms.setdefault(word, "phrase")
+
+    return terms
+
+def _distinct(terms, n):
+    # Drop terms that repeat a word already covered ("reserve holds" after
+    # "federal reserve")
+    picked, used = [], set()
+    for term in terms:
+        words = set(term.split())
+        if words & used:
+            continue
+        picked.append(term)
+        used |= words
+        if len(picked) == n:
+            break
+    return picked
+
+
+# ---------------- COUNT-MIN SKETCH ----------------
+class CountMinSketch:
+    __slots__ = ("rows",)
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _cells(self, term):
+        width = len(self.rows[0])
+        for seed, row in enumerate(self.rows):
+            yield row, hash((seed, term)) % width
+
+    def add(self, term, count=1):
+        for row, idx in self._cells(term):
+            row[idx] += count
+
+    def estimate(self, term):
+        return min(row[idx] for row, idx in self._cells(term))
+
+
+# ---------------- TRACKER ----------------
+class TrendingTracker:
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, window=WINDOW_BUCKETS, recent=RECENT_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        self.recent = recent
+        self._buckets = deque()
+        self._candidates = {}
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _current_bucket(self, now):
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        if not self._buckets or self._buckets[-1][0] != start:
+            self._buckets.append((start, CountMinSketch()))
+        oldest = start - (self.window - 1) * self.bucket_seconds
+        while self._buckets and self._buckets[0][0] < oldest:
+            self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def observe(self, articles, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            sketch = self._current_bucket(now)
+            for article in articles:
+                # The same story is fetched by many feeds and sessions;
+                # count it once.
+                url = article.get("url")
+                if not url or url in self._seen:
+                    continue
+                self._seen[url] = None
+                if len(self._seen) > MAX_SEEN_URLS:
+                    self._seen.popitem(last=False)
+
+                for term, kind in extract_terms(article.get("title")).items():
+                    sketch.add(term)
+                    self._candidates[term] = kind
+
+            if len(self._candidates) > MAX_CANDIDATES:
+                self._prune(now)
+
+    def _prune(self, now):
+        counts = self._window_counts(self._candidates, now)
+        keep = sorted(self._candidates, key=lambda t: counts[t][0] + counts[t][1], reverse=True)
+        self._candidates = {t: self._candidates[t] for t in keep[: MAX_CANDIDATES // 2]}
+
+    def _older_buckets(self):
+        # Buckets only exist once something was observed, so measure the
+        # older span by time rather than by how many buckets we hold.
+        if not self._buckets:
+            return 1
+        span = (self._buckets[-1][0] - self._buckets[0][0]) // self.bucket_seconds + 1
+        return max(span - self.recent, 1)
+
+    def _window_counts(self, terms, now):
+        recent_from = int(now // self.bucket_seconds) * self.bucket_seconds - (self.recent - 1) * self.bucket_seconds
+        counts = {}
+        for term in terms:
+            recent = older = 0
+            for start, sketch in self._buckets:
+                if start >= recent_from:
+                    recent += sketch.estimate(term)
+                else:
+                    older += sketch.estimate(term)
+            counts[term] = (recent, older)
+        return counts
+
+    def top(self, n=10, kind=None, now=None):
+        # Rising score: recent count against the older part of the window,
+        # scaled to the same number of buckets.
+        now = time.time() if now is None else now
+        with self._lock:
+            self._current_bucket(now)
+            kinds = {t: k for t, k in self._candidates.items() if kind is None or k == kind}
+            counts = self._window_counts(kinds, now)
+            older_buckets = self._older_buckets()
+
+        scored = []
+        for term, (recent, older) in counts.items():
+            if recent < MIN_RECENT_COUNT:
+                continue
+            baseline = older * self.recent / older_buckets
+            score = (recent - baseline) / math.sqrt(baseline + 1)
+            # Named entities and multi-word terms make better queries
+            score *= 1 + 0.5 * term.count(" ")
+            if kinds[term] == "entity":
+                score *= 2
+            if score > 0:
+                scored.append((score, term))
+
+        scored.sort(reverse=True)
+        return _distinct([term for _, term in scored], n)
+
+    def scores(self, terms, now=None):
+        # Rising score for each term we track; terms that never made the
+        # candidate set can't be trending and are left out
+        now = time.time() if now is None else now
+        with self._lock:
+            tracked = [t for t in terms if t in self._candidates]
+            counts = self._window_counts(tracked, now)
+            older_buckets = self._older_buckets()
+
+        scores = {}
+        for term, (recent, older) in counts.items():
+            baseline = older * self.recent / older_buckets
+            scores[term] = (recent - baseline) / math.sqrt(baseline + 1)
+        return scores
+
+
+def rank_interest_terms(titles, tracker, n=5):
+    # Pick personal terms from bookmark titles, preferring ones trending now
+    counts = Counter()
+    for title in titles:
+        counts.update(extract_terms(title).keys())
+    local = {t: c * (1 + t.count(" ")) for t, c in counts.items()}
+
+    # Only the strongest personal terms are worth a sketch lookup
+    shortlist = sorted(local, key=local.get, reverse=True)[: n * SHORTLIST_FACTOR]
+    trending = tracker.scores(shortlist)
+    ranked = sorted(
+        shortlist,
+        key=lambda t: max(trending.get(t, 0), 0) + local[t],
+        reverse=True
+    )
+    return _distinct(ranked, n)
+
+
+@st.cache_resource
+def get_trending_tracker():
+    return TrendingTracker()
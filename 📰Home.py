@@ -1,8 +1,13 @@
 import streamlit as st
-import requests
+import html
 import json
 import os
 from datetime import datetime, timezone
+from feeds import get_feed_store, thaw_article
+from resilience import stale_notice
+from trending import get_trending_tracker
+from bookmark_io import add_bookmark
+from thumbnails import thumbnail_url, prefetch_thumbnails
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(layout="wide")
@@ -36,14 +41,10 @@ BOOKMARK_FILE = "bookmarks.json"
 
 def load_bookmarks():
     if os.path.exists(BOOKMARK_FILE):
-        with open(BOOKMARK_FILE, "r") as f:
+        with open(BOOKMARK_FILE, "r", encoding="utf-8-sig") as f:
             return json.load(f)
     return []
 
-def save_bookmarks(bookmarks):
-    with open(BOOKMARK_FILE, "w") as f:
-        json.dump(bookmarks, f, indent=4)
-
 if "bookmarks" not in st.session_state:
     st.session_state.bookmarks = load_bookmarks()
 
@@ -110,37 +111,60 @@ SOURCES = {
     "abc-news": "ABC News"
 }
 
-API_KEY = st.secrets["NEWS_API_KEY"]
-@st.cache_data(ttl=3600)
-def fetch_articles(source_id=None, category=None):
-    base_url = "https://newsapi.org/v2/top-headlines"
+# Feeds come from the process-wide store so every session shares one copy
+feed_store = get_feed_store()
 
+def fetch_articles(source_id=None, category=None):
     if source_id:
-        url = f"{base_url}?sources={source_id}&pageSize=10&apiKey={API_KEY}"
-    elif category and category != "general":
-        url = f"{base_url}?country=us&category={category}&pageSize=10&apiKey={API_KEY}"
-    else:
-        url = f"{base_url}?country=us&pageSize=10&apiKey={API_KEY}"
+        return feed_store.publisher(source_id)[:10]
+    return feed_store.headlines("us", category)[:10]
+
+# ---------------- FETCH ----------------
+# The publisher feeds load in parallel within a render budget, so a slow
+# upstream costs seconds rather than one full deadline per source
+loading = []
+if st.session_state.category == "general":
+    feeds, loading = feed_store.publishers(SOURCES)
+    articles = sum([feeds[s][:3] for s in SOURCES], ())
+else:
+    articles = fetch_articles(category=st.session_state.category)
+
+# Feeds held past their TTL because upstream is failing
+stale_times = (
+    [feed_store.stale_since(source_id=s) for s in SOURCES]
+    if st.session_state.category == "general"
+    else [feed_store.stale_since(category=st.session_state.category)]
+)
+stale_since = min((t for t in stale_times if t), default=None)
 
-    try:
-        data = requests.get(url).json()
-        return data.get("articles", []) if data.get("status") == "ok" else []
-    except:
-        return []
+# ---------------- TRENDING ----------------
+# Built from headlines already fetched above, no extra API calls
+trending_terms = get_trending_tracker().top(8)
+if trending_terms:
+    st.markdown(
+        "<div class='trending-strip'><span class='trending-label'>🔥 Trending</span>"
+        + "".join(f"<span class='trending-chip'>{html.escape(term.title())}</span>" for term in trending_terms)
+        + "</div>",
+        unsafe_allow_html=True
+    )
 
 # ---------------- DISPLAY ----------------
 st.subheader(f"{st.session_state.category.capitalize()} Headlines")
 st.markdown('<div class="article-container">', unsafe_allow_html=True)
 
-articles = (
-    sum([fetch_articles(source_id=s)[:3] for s in SOURCES], [])
-    if st.session_state.category == "general"
-    else fetch_articles(category=st.session_state.category)
-)
+if stale_since:
+    st.warning(stale_notice(stale_since))
+
+if loading:
+    st.caption(
+        "Still loading " + ", ".join(SOURCES[s] for s in loading) + ". Refresh in a moment."
+    )
 
 if not articles:
     st.markdown("<div class='empty-card'>Sorry, no news available at the moment.</div>", unsafe_allow_html=True)
 
+prefetch_thumbnails(articles)
+
 for idx, article in enumerate(articles):
     source_id = article.get("source", {}).get("id")
     if source_id:
@@ -149,11 +173,11 @@ for idx, article in enumerate(articles):
     st.markdown(
         f"""
         <div class="article-card">
-            {'<img src="' + article['urlToImage'] + '">' if article.get('urlToImage') else ''}
+            {'<img src="' + thumbnail_url(article['urlToImage']) + '">' if article.get('urlToImage') else ''}
             <h3>
-                <a href="{article['url']}" target="_blank">{article['title']}</a>
+                <a href="{html.escape(article['url'])}" target="_blank">{html.escape(article.get('title') or '')}</a>
             </h3>
-            <p>{article.get('description','')}</p>
+            <p>{html.escape(article.get('description') or '')}</p>
             <small>{time_ago(article.get("publishedAt"))}</small>
         </div>
         """,
@@ -162,9 +186,11 @@ for idx, article in enumerate(articles):
 
     if not article_exists(article):
         if st.button("Save", key=f"save_{idx}"):
-            st.session_state.bookmarks.append(article)
-            save_bookmarks(st.session_state.bookmarks)
-            st.session_state.user_profile["saved_count"] += 1
+            # Locked re-read of bookmarks.json so other sessions' saves survive
+            saved = thaw_article(article)
+            if add_bookmark(saved):
+                st.session_state.user_profile["saved_count"] += 1
+            st.session_state.bookmarks.append(saved)
             st.success("Saved to bookmarks!")
     else:
         st.caption("✔ Already bookmarked")